@@ -3,9 +3,10 @@
 # ===============================
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from pathlib import Path
+import plotly.graph_objects as go
+
+from utils.data import load_data, load_filter_options, load_job_titles, filter_data, filter_vis_data, salary_histogram, filtered_csv, filter_cube, cube_mean
 
 # ===============================
 # Page Configuration
@@ -22,39 +23,20 @@ px.defaults.template = "plotly_white"
 # Data Loading
 # ===============================
 
-# Clear cache when switching data source manually
-st.cache_data.clear()
-
-@st.cache_data
-def load_data():
-    # URL (production / GitHub)
-    return pd.read_csv(
-        "https://raw.githubusercontent.com/DegsTerin/Dashboard/refs/heads/main/Data/Salaries.csv"
-    )
-
-    # LOCAL (uncomment for local testing)
-    #data_path = Path(__file__).parent / "Data" / "Salaries.csv"
-    #return pd.read_csv(data_path)
-
-df = load_data()
-
-# ===============================
-# Dataset Validation
-# ===============================
-REQUIRED_COLUMNS = {
-    "Year", "Experience_Level", "Employment_Type", "Company_Size",
-    "Salary_In_Usd", "Job_Title", "Remote_Ratio", "Employee_Residence_Iso3"
-}
+# Clear cache only on explicit request (e.g. after switching data source manually)
+if st.sidebar.button("🔄 Reload Data"):
+    st.cache_data.clear()
 
-if not REQUIRED_COLUMNS.issubset(df.columns):
-    st.error("The dataset does not contain all the necessary columns.")
-    st.stop()
+# Stops the page with an error if the dataset lacks a required column
+load_data()
 
 # ===============================
 # Sidebar - Filters
 # ===============================
 st.sidebar.header("🔍 Filters")
 
+filter_options = load_filter_options()
+
 currency = st.sidebar.radio(
     "Currency",
     ["USD", "EUR"],
@@ -63,45 +45,37 @@ currency = st.sidebar.radio(
 
 years = st.sidebar.multiselect(
     "Year",
-    sorted(df["Year"].unique()),
-    default=sorted(df["Year"].unique())
+    filter_options["Year"],
+    default=filter_options["Year"]
 )
 
 experience_levels = st.sidebar.multiselect(
     "Experience Level",
-    sorted(df["Experience_Level"].unique()),
-    default=sorted(df["Experience_Level"].unique())
+    filter_options["Experience_Level"],
+    default=filter_options["Experience_Level"]
 )
 
 employment_types = st.sidebar.multiselect(
     "Employment Type",
-    sorted(df["Employment_Type"].unique()),
-    default=sorted(df["Employment_Type"].unique())
+    filter_options["Employment_Type"],
+    default=filter_options["Employment_Type"]
 )
 
 company_sizes = st.sidebar.multiselect(
     "Company Size",
-    sorted(df["Company_Size"].unique()),
-    default=sorted(df["Company_Size"].unique())
+    filter_options["Company_Size"],
+    default=filter_options["Company_Size"]
 )
 
 # ===============================
 # Filter with cache
 # ===============================
-@st.cache_data
-def filter_data(df, years, experience_levels, employment_types, company_sizes):
-    return df[
-        (df["Year"].isin(years)) &
-        (df["Experience_Level"].isin(experience_levels)) &
-        (df["Employment_Type"].isin(employment_types)) &
-        (df["Company_Size"].isin(company_sizes))
-    ]
-
-df_filtered = filter_data(df, years, experience_levels, employment_types, company_sizes)
+df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
 
 # Simple USD \u2192 EUR conversion (fixed, intentional)
 EXCHANGE_RATE_EUR = 0.92
-df_filtered["Display_Salary"] = df_filtered["Salary_In_Usd"] if currency == "USD" else df_filtered["Salary_In_Usd"] * EXCHANGE_RATE_EUR
+# Applied to aggregated results only, never as a new column on the filtered data
+currency_rate = 1.0 if currency == "USD" else EXCHANGE_RATE_EUR
 
 # Determine the currency symbol
 currency_symbol = "$" if currency == "USD" else "€"
@@ -122,11 +96,12 @@ if df_filtered.empty:
     average_salary = median_salary = maximum_salary = total_records = 0
     most_frequent_job_title = "-"
 else:
-    average_salary = df_filtered["Display_Salary"].mean()
-    median_salary = df_filtered["Display_Salary"].median()
-    maximum_salary = df_filtered["Display_Salary"].max()
-    total_records = len(df_filtered)
-    most_frequent_job_title = df_filtered["Job_Title"].mode().iloc[0]
+    salary_stats = df_filtered["Salary_In_Usd"].agg(["mean", "median", "max", "count"])
+    average_salary = salary_stats["mean"] * currency_rate
+    median_salary = salary_stats["median"] * currency_rate
+    maximum_salary = salary_stats["max"] * currency_rate
+    total_records = int(salary_stats["count"])
+    most_frequent_job_title = df_filtered["Job_Title"].value_counts().index[0]
 
 c1, c2, c3, c4, c5 = st.columns(5)
 c1.metric("Average Salary", f"{currency_symbol}{average_salary:,.0f}")
@@ -138,13 +113,14 @@ c5.metric("Most Frequent Job Title", most_frequent_job_title)
 # ===============================
 # Automatic Insight
 # ===============================
-if not df_filtered.empty and df_filtered["Year"].nunique() > 1:
-    growth = (
-        df_filtered.groupby("Year")["Display_Salary"]
-        .mean()
-        .pct_change()
-        .mean() * 100
-    )
+# Growth is a ratio, so the USD yearly averages from the cube are enough
+cube_filtered = filter_cube(years, experience_levels, employment_types, company_sizes)
+yearly_salary = cube_mean(cube_filtered, "Year").sort_index()
+
+if len(yearly_salary) > 1:
+    # Compound annual growth between the first and last selected years
+    year_span = int(yearly_salary.index[-1] - yearly_salary.index[0])
+    growth = ((yearly_salary.iloc[-1] / yearly_salary.iloc[0]) ** (1 / year_span) - 1) * 100
 
     if growth > 0:
         st.success(f"Average salary growth trend: {growth:.1f}% per year")
@@ -156,116 +132,140 @@ st.divider()
 # ===============================
 # Outlier removal (visual)
 # ===============================
-if not df_filtered.empty:
-    limit = df_filtered["Display_Salary"].quantile(0.99)
-    df_vis = df_filtered[df_filtered["Display_Salary"] <= limit]
-else:
-    df_vis = df_filtered
+df_vis = filter_vis_data(years, experience_levels, employment_types, company_sizes)
 
 # ===============================
-# Charts
+# Chart Functions
 # ===============================
-st.subheader("Charts")
+# One function per chart. Changing the compared job titles does not redraw
+# them because the job title comparison below is a fragment.
+# Figure builders (here and on the other pages) are cached on their small
+# aggregated inputs, so Plotly only rebuilds a figure when its data or
+# labels change
+@st.cache_data(ttl="1h", max_entries=20)
+def top_job_titles_figure(top_job_titles, currency, currency_symbol):
+    fig = px.bar(
+        top_job_titles,
+        x="Display_Salary",
+        y="Job_Title",
+        orientation="h",
+        title="Top 10 Job Titles by Average Salary",
+        labels={"Display_Salary": f"Average Annual Salary ({currency})", "Job_Title": ""}
+    )
+    fig.update_traces(
+        hovertemplate=f"Average salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
+    )
+    return fig
 
-col1, col2 = st.columns(2)
 
-with col1:
-    if not df_vis.empty:
-        top_job_titles = (
-            df_vis.groupby("Job_Title", as_index=False)["Display_Salary"]
-            .mean()
-            .nlargest(10, "Display_Salary")
-            .sort_values("Display_Salary")
-        )
+def top_job_titles_chart(df_vis, currency_rate, currency, currency_symbol):
+    if df_vis.empty:
+        return
 
-        fig = px.bar(
-            top_job_titles,
-            x="Display_Salary",
-            y="Job_Title",
-            orientation="h",
-            title="Top 10 Job Titles by Average Salary",
-            labels={"Display_Salary": f"Average Annual Salary ({currency})", "Job_Title": ""}
-        )
-        fig.update_traces(
-            hovertemplate=f"Average salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    top_job_titles = (
+        df_vis.groupby("Job_Title", observed=True)["Salary_In_Usd"]
+        .mean()
+        .mul(currency_rate)
+        .rename("Display_Salary")
+        .nlargest(10)
+        .sort_values()
+        .reset_index()
+    )
 
-with col2:
-    if not df_vis.empty:
-        fig = px.histogram(
-            df_vis,
-            x="Display_Salary",
-            nbins=30,
-            title="Salary Distribution (outliers removed)",
-            labels={"Display_Salary": f"Annual Salary ({currency})", "count": ""}
-        )
-        fig.update_traces(
+    fig = top_job_titles_figure(top_job_titles, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="top_jobs")
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def salary_distribution_figure(counts, edges, currency_rate, currency, currency_symbol):
+    # Pre-binned counts drawn as bars, one per bin
+    edges = edges * currency_rate
+    fig = go.Figure(
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=edges[1:] - edges[:-1],
             hovertemplate=f"Annual Salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
         )
-        st.plotly_chart(fig, use_container_width=True)
+    )
+    fig.update_layout(
+        template=px.defaults.template,
+        title="Salary Distribution (outliers removed)",
+        xaxis_title=f"Annual Salary ({currency})",
+        yaxis_title="",
+        bargap=0
+    )
+    return fig
 
-col3, col4 = st.columns(2)
 
-with col3:
-    if not df_vis.empty:
-        remote_ratio = df_vis["Remote_Ratio"].value_counts().reset_index()
-        remote_ratio.columns = ["Type", "Quantity"]
-
-        fig = px.pie(
-            remote_ratio,
-            names="Type",
-            values="Quantity",
-            hole=0.5,
-            title="Proportion of Employment Types"
-        )
-        fig.update_traces(
-            textinfo="percent+label"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+def salary_distribution_chart(counts, edges, currency_rate, currency, currency_symbol):
+    if counts.sum() == 0:
+        return
 
-with col4:
-    df_ds = df_vis[df_vis["Job_Title"] == "Data Scientist"]
+    fig = salary_distribution_figure(counts, edges, currency_rate, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="hist")
 
-    if df_ds.empty:
-        st.info("No Data Scientist data for current filters.")
-    else:
-        average_country_salary = (
-            df_ds.groupby("Employee_Residence_Iso3", as_index=False)["Display_Salary"]
-            .mean()
-        )
 
-        fig = px.choropleth(
-            average_country_salary,
-            locations="Employee_Residence_Iso3",
-            color="Display_Salary",
-            color_continuous_scale="RdYlGn",
-            title="Average Data Scientist Salary by Country",
-            labels={"Display_Salary": f"Average Salary ({currency})"}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+@st.cache_data(ttl="1h", max_entries=20)
+def remote_ratio_figure(remote_ratio):
+    fig = px.pie(
+        remote_ratio,
+        names="Type",
+        values="Quantity",
+        hole=0.5,
+        title="Proportion of Employment Types"
+    )
+    fig.update_traces(
+        textinfo="percent+label"
+    )
+    return fig
 
-# ===============================
-# Job Title Comparison
-# ===============================
-st.subheader("Job Title Comparison")
 
-if not df_filtered.empty:
-    c1, c2 = st.columns(2)
-    job_title_a = c1.selectbox("Job Title A", sorted(df["Job_Title"].unique()))
-    job_title_b = c2.selectbox(
-        "Job Title B",
-        sorted(df["Job_Title"].unique()),
-        index=1 if len(df["Job_Title"].unique()) > 1 else 0
+def remote_ratio_chart(df_vis):
+    if df_vis.empty:
+        return
+
+    remote_ratio = df_vis.groupby("Remote_Ratio", observed=True).size().sort_values(ascending=False).reset_index()
+    remote_ratio.columns = ["Type", "Quantity"]
+
+    fig = remote_ratio_figure(remote_ratio)
+    st.plotly_chart(fig, use_container_width=True, key="remote_pie")
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def data_scientist_country_figure(average_country_salary, currency):
+    fig = px.choropleth(
+        average_country_salary,
+        locations="Employee_Residence_Iso3",
+        color="Display_Salary",
+        color_continuous_scale="RdYlGn",
+        title="Average Data Scientist Salary by Country",
+        labels={"Display_Salary": f"Average Salary ({currency})"}
     )
+    return fig
 
-    comparison = (
-        df_filtered[df_filtered["Job_Title"].isin([job_title_a, job_title_b])]
-        .groupby("Job_Title")["Display_Salary"]
-        .agg(average="mean", median="median")
+
+def data_scientist_country_chart(df_vis, currency_rate, currency):
+    df_ds = df_vis[df_vis["Job_Title"] == "Data Scientist"]
+
+    if df_ds.empty:
+        st.info("No Data Scientist data for current filters.")
+        return
+
+    average_country_salary = (
+        df_ds.groupby("Employee_Residence_Iso3", observed=True)["Salary_In_Usd"]
+        .mean()
+        .mul(currency_rate)
+        .rename("Display_Salary")
         .reset_index()
     )
 
+    fig = data_scientist_country_figure(average_country_salary, currency)
+    st.plotly_chart(fig, use_container_width=True, key="choropleth")
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def job_title_comparison_figure(comparison, currency, currency_symbol):
     fig = px.bar(
         comparison,
         x="Job_Title",
@@ -282,8 +282,30 @@ if not df_filtered.empty:
     fig.update_traces(
         hovertemplate=f"Salary: {currency_symbol}%{{y:,.0f}}<extra></extra>"
     )
+    return fig
+
+
+# Selecting job titles only reruns this fragment, not the charts above
+@st.fragment
+def job_title_comparison(job_titles, df_filtered, currency_rate, currency, currency_symbol):
+    c1, c2 = st.columns(2)
+    job_title_a = c1.selectbox("Job Title A", job_titles)
+    job_title_b = c2.selectbox(
+        "Job Title B",
+        job_titles,
+        index=1 if len(job_titles) > 1 else 0
+    )
 
-    st.plotly_chart(fig, use_container_width=True)
+    comparison = (
+        df_filtered[df_filtered["Job_Title"].isin([job_title_a, job_title_b])]
+        .groupby("Job_Title", observed=True)["Salary_In_Usd"]
+        .agg(average="mean", median="median")
+        .mul(currency_rate)
+        .reset_index()
+    )
+
+    fig = job_title_comparison_figure(comparison, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="comparison")
 
     # Extra insight
     if len(comparison) >= 2:
@@ -301,18 +323,63 @@ if not df_filtered.empty:
     elif len(comparison) == 1:
         st.info(f"Only data for {comparison['Job_Title'].iloc[0]} is available under current filters.")
 
+# ===============================
+# Charts
+# ===============================
+st.subheader("Charts")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    top_job_titles_chart(df_vis, currency_rate, currency, currency_symbol)
+
+with col2:
+    salary_counts, salary_edges = salary_histogram(
+        years, experience_levels, employment_types, company_sizes, bins=30, trim_outliers=True
+    )
+    salary_distribution_chart(salary_counts, salary_edges, currency_rate, currency, currency_symbol)
+
+col3, col4 = st.columns(2)
+
+with col3:
+    remote_ratio_chart(df_vis)
+
+with col4:
+    data_scientist_country_chart(df_vis, currency_rate, currency)
+
+# ===============================
+# Job Title Comparison
+# ===============================
+st.subheader("Job Title Comparison")
+
+if not df_filtered.empty:
+    job_title_comparison(load_job_titles(), df_filtered, currency_rate, currency, currency_symbol)
+
 # ===============================
 # Table
 # ===============================
 st.subheader("📋 Detailed Data")
-st.dataframe(df_filtered, use_container_width=True)
+
+TABLE_PREVIEW_ROWS = 500
+
+# Only a preview is sent to the browser unless the full table is requested;
+# toggling it reruns just this fragment
+@st.fragment
+def detailed_data_table(df_filtered):
+    if st.checkbox("Show all rows"):
+        st.dataframe(df_filtered, use_container_width=True)
+    else:
+        st.dataframe(df_filtered.head(TABLE_PREVIEW_ROWS), use_container_width=True)
+        st.caption(f"Showing {min(TABLE_PREVIEW_ROWS, len(df_filtered)):,} of {len(df_filtered):,} rows")
+
+detailed_data_table(df_filtered)
 
 # ===============================
 # Data Download
 # ===============================
 st.sidebar.download_button(
     "📥 Download Filtered Data",
-    data=df_filtered.to_csv(index=False),
+    data=filtered_csv(years, experience_levels, employment_types, company_sizes),
     file_name="filtered_data.csv",
     mime="text/csv"
 )
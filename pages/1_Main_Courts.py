@@ -3,9 +3,10 @@
 # ===============================
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from utils.data import load_data, load_filter_options, load_job_titles, filter_data, filtered_csv, filter_cube, cube_mean
+
 # ===============================
 # GLOBAL VISUAL CONFIGURATION
 # ===============================
@@ -20,65 +21,121 @@ px.defaults.template = "plotly_white"
 px.defaults.color_discrete_sequence = PALETTE
 
 # ===============================
-# Data Loading
+# FIGURES
 # ===============================
-
-# Clear cache when switching data source manually
-st.cache_data.clear()
-
-@st.cache_data
-def load_data():
-    # URL (production / GitHub)
-    return pd.read_csv(
-        "https://raw.githubusercontent.com/DegsTerin/Dashboard/refs/heads/main/Data/Salaries.csv"
+# Cached figure builders, see the note above the chart functions in Home.py
+@st.cache_data(ttl="1h", max_entries=20)
+def salary_evolution_figure(salary_evolution, currency, currency_symbol):
+    fig = px.line(
+        salary_evolution,
+        x="Year",
+        y="Display_Salary",
+        markers=True,
+        title="Average Salary by Year",
+        labels={"Display_Salary": f"Average Salary ({currency})", "Year": ""}
+    )
+    fig.update_traces(
+        hovertemplate=f"Year: %{{x}}<br>Average Salary: {currency_symbol}%{{y:,.0f}}<extra></extra>"
+    )
+    return fig
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def top_job_titles_figure(top_job_titles, currency, currency_symbol):
+    fig = px.bar(
+        top_job_titles,
+        x="Display_Salary",
+        y="Job_Title",
+        orientation="h",
+        title="Top 10 Job Titles by Average Salary",
+        labels={"Display_Salary": f"Average Salary ({currency})", "Job_Title": ""}
     )
 
-    # LOCAL (uncomment for local testing)
-    #return pd.read_csv("Data/Salaries.csv")
+    fig.update_traces(
+        hovertemplate=f"Average salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
+    )
+    return fig
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def experience_company_size_figure(heatmap_data):
+    fig = px.density_heatmap(
+        heatmap_data,
+        x="Company_Size",
+        y="Experience_Level",
+        z="Display_Salary",
+        color_continuous_scale="Blues",
+        title="Average Salary by Experience Level and Company Size"
+    )
+    return fig
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def job_title_comparison_figure(comparison, currency, currency_symbol):
+    fig = px.bar(
+        comparison,
+        x="Job_Title",
+        y=["average", "median"],
+        barmode="group",
+        title="Salary Comparison (Average vs. Median)",
+        labels={"value": f"Salary ({currency})", "variable": "Metric"}
+    )
 
-df = load_data()
+    fig.update_traces(
+        hovertemplate=f"Salary: {currency_symbol}%{{y:,.0f}}<extra></extra>"
+    )
+    return fig
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def country_ranking_figure(country_ranking, currency):
+    fig = px.bar(
+        country_ranking,
+        x="Display_Salary",
+        y="Employee_Residence_Iso3",
+        orientation="h",
+        title="Top 10 Countries by Average Salary",
+        labels={"Display_Salary": f"Average Salary ({currency})", "Employee_Residence_Iso3": "Country"}
+    )
+    return fig
 
 # ===============================
-# DATA VALIDATION
+# Data Loading
 # ===============================
-REQUIRED_COLUMNS = {
-    "Year", "Experience_Level", "Employment_Type", "Company_Size",
-    "Salary_In_Usd", "Job_Title", "Remote_Ratio", "Employee_Residence_Iso3"
-}
 
-if not REQUIRED_COLUMNS.issubset(df.columns):
-    st.error("Invalid or incomplete dataset. Missing required columns.")
-    st.stop()
+# Clear cache only on explicit request (e.g. after switching data source manually)
+if st.sidebar.button("🔄 Reload Data"):
+    st.cache_data.clear()
+
+# Stops the page with an error if the dataset lacks a required column
+load_data()
 
 # ===============================
 # SIDEBAR
 # ===============================
 st.sidebar.header("🔍 Filters")
 
+filter_options = load_filter_options()
+
 currency = st.sidebar.radio("Currency", ["USD", "EUR"], horizontal=True)
 
-years = st.sidebar.multiselect("Year", sorted(df["Year"].unique()), default=sorted(df["Year"].unique()))
-experience_levels = st.sidebar.multiselect("Experience Level", sorted(df["Experience_Level"].unique()), default=sorted(df["Experience_Level"].unique()))
-employment_types = st.sidebar.multiselect("Employment Type", sorted(df["Employment_Type"].unique()), default=sorted(df["Employment_Type"].unique()))
-company_sizes = st.sidebar.multiselect("Company Size", sorted(df["Company_Size"].unique()), default=sorted(df["Company_Size"].unique()))
+years = st.sidebar.multiselect("Year", filter_options["Year"], default=filter_options["Year"])
+experience_levels = st.sidebar.multiselect("Experience Level", filter_options["Experience_Level"], default=filter_options["Experience_Level"])
+employment_types = st.sidebar.multiselect("Employment Type", filter_options["Employment_Type"], default=filter_options["Employment_Type"])
+company_sizes = st.sidebar.multiselect("Company Size", filter_options["Company_Size"], default=filter_options["Company_Size"])
 
 # ===============================
 # FILTER WITH CACHE
 # ===============================
-@st.cache_data
-def filter_data(df, years, experience_levels, employment_types, company_sizes):
-    return df[
-        df["Year"].isin(years) &
-        df["Experience_Level"].isin(experience_levels) &
-        df["Employment_Type"].isin(employment_types) &
-        df["Company_Size"].isin(company_sizes)
-    ]
+df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
 
-df_filtered = filter_data(df, years, experience_levels, employment_types, company_sizes)
+# Pre-aggregated salary sums/counts, used by the average-based charts
+cube_filtered = filter_cube(years, experience_levels, employment_types, company_sizes)
 
 # Simple USD \u2192 EUR conversion (fixed, intentional)
 EXCHANGE_RATE_EUR = 0.92
-df_filtered["Display_Salary"] = df_filtered["Salary_In_Usd"] if currency == "USD" else df_filtered["Salary_In_Usd"] * EXCHANGE_RATE_EUR
+# Applied to aggregated results only, never as a new column on the filtered data
+currency_rate = 1.0 if currency == "USD" else EXCHANGE_RATE_EUR
 
 # Determine the currency symbol
 currency_symbol = "$" if currency == "USD" else "€"
@@ -98,12 +155,14 @@ if df_filtered.empty:
     st.warning("No data available for the selected filters.")
     st.stop()
 
+salary_stats = df_filtered["Salary_In_Usd"].agg(["mean", "median", "max", "count"])
+
 c1, c2, c3, c4 = st.columns(4)
 
-c1.metric("Average Salary", f"{currency_symbol}{df_filtered['Display_Salary'].mean():,.0f}")
-c2.metric("Median Salary", f"{currency_symbol}{df_filtered['Display_Salary'].median():,.0f}")
-c3.metric("Maximum Salary", f"{currency_symbol}{df_filtered['Display_Salary'].max():,.0f}")
-c4.metric("Records", len(df_filtered))
+c1.metric("Average Salary", f"{currency_symbol}{salary_stats['mean'] * currency_rate:,.0f}")
+c2.metric("Median Salary", f"{currency_symbol}{salary_stats['median'] * currency_rate:,.0f}")
+c3.metric("Maximum Salary", f"{currency_symbol}{salary_stats['max'] * currency_rate:,.0f}")
+c4.metric("Records", int(salary_stats["count"]))
 
 st.divider()
 
@@ -112,106 +171,88 @@ st.divider()
 # ===============================
 st.subheader("📈 Salary Evolution Over Time")
 
-salary_evolution = df_filtered.groupby("Year")["Display_Salary"].mean().reset_index()
+def salary_evolution_chart(cube_filtered, currency_rate, currency, currency_symbol):
+    salary_evolution = (
+        cube_mean(cube_filtered, "Year")
+        .mul(currency_rate)
+        .rename("Display_Salary")
+        .reset_index()
+    )
 
-fig = px.line(
-    salary_evolution,
-    x="Year",
-    y="Display_Salary",
-    markers=True,
-    title="Average Salary by Year",
-    labels={"Display_Salary": f"Average Salary ({currency})", "Year": ""}
-)
-fig.update_traces(
-    hovertemplate=f"Year: %{{x}}<br>Average Salary: {currency_symbol}%{{y:,.0f}}<extra></extra>"
-)
-st.plotly_chart(fig, use_container_width=True)
+    fig = salary_evolution_figure(salary_evolution, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="salary_evolution")
+
+salary_evolution_chart(cube_filtered, currency_rate, currency, currency_symbol)
 
 # ===============================
 # TOP JOB TITLES
 # ===============================
 st.subheader("🏆 Highest Paid Job Titles")
 
-top_job_titles = (
-    df_filtered.groupby("Job_Title", as_index=False)["Display_Salary"]
-    .mean()
-    .nlargest(10, "Display_Salary")
-    .sort_values("Display_Salary")
-)
+def top_job_titles_chart(cube_filtered, currency_rate, currency, currency_symbol):
+    top_job_titles = (
+        cube_mean(cube_filtered, "Job_Title")
+        .mul(currency_rate)
+        .rename("Display_Salary")
+        .nlargest(10)
+        .sort_values()
+        .reset_index()
+    )
 
-fig = px.bar(
-    top_job_titles,
-    x="Display_Salary",
-    y="Job_Title",
-    orientation="h",
-    title="Top 10 Job Titles by Average Salary",
-    labels={"Display_Salary": f"Average Salary ({currency})", "Job_Title": ""}
-)
+    fig = top_job_titles_figure(top_job_titles, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="top_jobs")
 
-fig.update_traces(
-    hovertemplate=f"Average salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
-)
-st.plotly_chart(fig, use_container_width=True)
+top_job_titles_chart(cube_filtered, currency_rate, currency, currency_symbol)
 
 # ===============================
 # EXPERIENCE LEVEL x COMPANY SIZE HEATMAP (NEW)
 # ===============================
 st.subheader("🔥 Experience Level vs. Company Size")
 
-heatmap_data = (
-    df_filtered.groupby(["Experience_Level", "Company_Size"])["Display_Salary"]
-    .mean()
-    .reset_index()
-)
+def experience_company_size_heatmap(cube_filtered, currency_rate):
+    heatmap_data = (
+        cube_mean(cube_filtered, ["Experience_Level", "Company_Size"])
+        .mul(currency_rate)
+        .rename("Display_Salary")
+        .reset_index()
+    )
 
-fig = px.density_heatmap(
-    heatmap_data,
-    x="Company_Size",
-    y="Experience_Level",
-    z="Display_Salary",
-    color_continuous_scale="Blues",
-    title="Average Salary by Experience Level and Company Size"
-)
+    fig = experience_company_size_figure(heatmap_data)
+    st.plotly_chart(fig, use_container_width=True, key="heatmap")
 
-st.plotly_chart(fig, use_container_width=True)
+experience_company_size_heatmap(cube_filtered, currency_rate)
 
 # ===============================
 # JOB TITLE COMPARISON (IMPROVED)
 # ===============================
 st.subheader("⚖️ Job Title Comparison")
 
-job_title_a_col, job_title_b_col = st.columns(2)
-job_title_a = job_title_a_col.selectbox("Job Title A", sorted(df["Job_Title"].unique()))
-job_title_b = job_title_b_col.selectbox("Job Title B", sorted(df["Job_Title"].unique()), index=1)
-
-comparison = (
-    df_filtered[df_filtered["Job_Title"].isin([job_title_a, job_title_b])]
-    .groupby("Job_Title")["Display_Salary"]
-    .agg(average="mean", median="median")
-    .reset_index()
-)
-
-fig = px.bar(
-    comparison,
-    x="Job_Title",
-    y=["average", "median"],
-    barmode="group",
-    title="Salary Comparison (Average vs. Median)",
-    labels={"value": f"Salary ({currency})", "variable": "Metric"}
-)
+# Selecting job titles only reruns this fragment, not the rest of the page
+@st.fragment
+def job_title_comparison(job_titles, df_filtered, currency_rate, currency, currency_symbol):
+    job_title_a_col, job_title_b_col = st.columns(2)
+    job_title_a = job_title_a_col.selectbox("Job Title A", job_titles)
+    job_title_b = job_title_b_col.selectbox("Job Title B", job_titles, index=1)
+
+    comparison = (
+        df_filtered[df_filtered["Job_Title"].isin([job_title_a, job_title_b])]
+        .groupby("Job_Title", observed=True)["Salary_In_Usd"]
+        .agg(average="mean", median="median")
+        .mul(currency_rate)
+        .reset_index()
+    )
 
-fig.update_traces(
-    hovertemplate=f"Salary: {currency_symbol}%{{y:,.0f}}<extra></extra>"
-)
+    fig = job_title_comparison_figure(comparison, currency, currency_symbol)
+    st.plotly_chart(fig, use_container_width=True, key="comparison")
 
-st.plotly_chart(fig, use_container_width=True)
+    # Ensure comparison has at least two rows before calculating delta
+    if len(comparison) >= 2:
+        delta = (comparison.loc[1, "average"] / comparison.loc[0, "average"] - 1) * 100
+        st.info(f"{job_title_b} typically pays **{delta:.1f}%** more than {job_title_a} on average.")
+    else:
+        st.info(f"Not enough data to compare {job_title_a} and {job_title_b}.")
 
-# Ensure comparison has at least two rows before calculating delta
-if len(comparison) >= 2:
-    delta = (comparison.loc[1, "average"] / comparison.loc[0, "average"] - 1) * 100
-    st.info(f"{job_title_b} typically pays **{delta:.1f}%** more than {job_title_a} on average.")
-else:
-    st.info(f"Not enough data to compare {job_title_a} and {job_title_b}.")
+job_title_comparison(load_job_titles(), df_filtered, currency_rate, currency, currency_symbol)
 
 
 # ===============================
@@ -219,36 +260,45 @@ else:
 # ===============================
 st.subheader("🌍 Countries with Highest Average Salaries")
 
-country_ranking = (
-    df_filtered.groupby("Employee_Residence_Iso3")["Display_Salary"]
-    .mean()
-    .nlargest(10)
-    .reset_index()
-)
+def country_ranking_chart(cube_filtered, currency_rate, currency):
+    country_ranking = (
+        cube_mean(cube_filtered, "Employee_Residence_Iso3")
+        .mul(currency_rate)
+        .rename("Display_Salary")
+        .nlargest(10)
+        .reset_index()
+    )
 
-fig = px.bar(
-    country_ranking,
-    x="Display_Salary",
-    y="Employee_Residence_Iso3",
-    orientation="h",
-    title="Top 10 Countries by Average Salary",
-    labels={"Display_Salary": f"Average Salary ({currency})", "Employee_Residence_Iso3": "Country"}
-)
+    fig = country_ranking_figure(country_ranking, currency)
+    st.plotly_chart(fig, use_container_width=True, key="country_ranking")
 
-st.plotly_chart(fig, use_container_width=True)
+country_ranking_chart(cube_filtered, currency_rate, currency)
 
 # ===============================
 # TABLE
 # ===============================
 st.subheader("📋 Detailed Data")
-st.dataframe(df_filtered, use_container_width=True)
+
+TABLE_PREVIEW_ROWS = 500
+
+# Only a preview is sent to the browser unless the full table is requested;
+# toggling it reruns just this fragment
+@st.fragment
+def detailed_data_table(df_filtered):
+    if st.checkbox("Show all rows"):
+        st.dataframe(df_filtered, use_container_width=True)
+    else:
+        st.dataframe(df_filtered.head(TABLE_PREVIEW_ROWS), use_container_width=True)
+        st.caption(f"Showing {min(TABLE_PREVIEW_ROWS, len(df_filtered)):,} of {len(df_filtered):,} rows")
+
+detailed_data_table(df_filtered)
 
 # ===============================
 # Data Download
 # ===============================
 st.sidebar.download_button(
     "📥 Download Filtered Data",
-    data=df_filtered.to_csv(index=False),
+    data=filtered_csv(years, experience_levels, employment_types, company_sizes),
     file_name="filtered_data.csv",
     mime="text/csv"
 )
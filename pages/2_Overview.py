@@ -3,8 +3,10 @@
 # ===============================
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.data import load_data, load_filter_options, filter_data, salary_histogram, filtered_csv
 
 # ===============================
 # GLOBAL VISUAL CONFIGURATION
@@ -20,65 +22,63 @@ px.defaults.template = "plotly_white"
 px.defaults.color_discrete_sequence = PALETTE
 
 # ===============================
-# Data Loading
-# ===============================
-
-# Clear cache when switching data source manually
-st.cache_data.clear()
-
-@st.cache_data
-def load_data():
-    # URL (production / GitHub)
-    return pd.read_csv(
-        "https://raw.githubusercontent.com/DegsTerin/Dashboard/refs/heads/main/Data/Salaries.csv"
+# FIGURES
+# ===============================
+# Cached figure builders, see the note above the chart functions in Home.py
+@st.cache_data(ttl="1h", max_entries=20)
+def salary_distribution_figure(counts, edges, currency_rate, currency, currency_symbol):
+    edges = edges * currency_rate
+    fig = go.Figure(
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=edges[1:] - edges[:-1],
+            marker_color=PALETTE[0],
+            hovertemplate=f"Annual Salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
+        )
     )
-
-    # LOCAL (uncomment for local testing)
-    #return pd.read_csv("Data/Salaries.csv")
-
-df = load_data()
+    fig.update_layout(
+        template=px.defaults.template,
+        title="Salary Distribution",
+        xaxis_title=f"Annual Salary ({currency})",
+        yaxis_title="count",
+        bargap=0
+    )
+    return fig
 
 # ===============================
-# DATA VALIDATION
+# Data Loading
 # ===============================
-REQUIRED_COLUMNS = {
-    "Year", "Experience_Level", "Employment_Type", "Company_Size",
-    "Salary_In_Usd", "Job_Title", "Remote_Ratio", "Employee_Residence_Iso3"
-}
 
-if not REQUIRED_COLUMNS.issubset(df.columns):
-    st.error("Invalid or incomplete dataset. Missing required columns.")
-    st.stop()
+# Clear cache only on explicit request (e.g. after switching data source manually)
+if st.sidebar.button("🔄 Reload Data"):
+    st.cache_data.clear()
+
+# Stops the page with an error if the dataset lacks a required column
+load_data()
 
 # ===============================
 # SIDEBAR
 # ===============================
 st.sidebar.header("🔍 Filters")
 
+filter_options = load_filter_options()
+
 currency = st.sidebar.radio("Currency", ["USD", "EUR"], horizontal=True)
 
-years = st.sidebar.multiselect("Year", sorted(df["Year"].unique()), default=sorted(df["Year"].unique()))
-experience_levels = st.sidebar.multiselect("Experience Level", sorted(df["Experience_Level"].unique()), default=sorted(df["Experience_Level"].unique()))
-employment_types = st.sidebar.multiselect("Employment Type", sorted(df["Employment_Type"].unique()), default=sorted(df["Employment_Type"].unique()))
-company_sizes = st.sidebar.multiselect("Company Size", sorted(df["Company_Size"].unique()), default=sorted(df["Company_Size"].unique()))
+years = st.sidebar.multiselect("Year", filter_options["Year"], default=filter_options["Year"])
+experience_levels = st.sidebar.multiselect("Experience Level", filter_options["Experience_Level"], default=filter_options["Experience_Level"])
+employment_types = st.sidebar.multiselect("Employment Type", filter_options["Employment_Type"], default=filter_options["Employment_Type"])
+company_sizes = st.sidebar.multiselect("Company Size", filter_options["Company_Size"], default=filter_options["Company_Size"])
 
 # ===============================
 # FILTER WITH CACHE
 # ===============================
-@st.cache_data
-def filter_data(df, years, experience_levels, employment_types, company_sizes):
-    return df[
-        df["Year"].isin(years) &
-        df["Experience_Level"].isin(experience_levels) &
-        df["Employment_Type"].isin(employment_types) &
-        df["Company_Size"].isin(company_sizes)
-    ]
-
-df_filtered = filter_data(df, years, experience_levels, employment_types, company_sizes)
+df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
 
 # Simple USD \u2192 EUR conversion (fixed, intentional)
 EXCHANGE_RATE_EUR = 0.92
-df_filtered["Display_Salary"] = df_filtered["Salary_In_Usd"] if currency == "USD" else df_filtered["Salary_In_Usd"] * EXCHANGE_RATE_EUR
+currency_rate = 1.0 if currency == "USD" else EXCHANGE_RATE_EUR
 
 # Determine the currency symbol
 currency_symbol = "$" if currency == "USD" else "€"
@@ -98,35 +98,33 @@ if df_filtered.empty:
     st.warning("No data available for the selected filters.")
     st.stop()
 
+salary_stats = df_filtered["Salary_In_Usd"].agg(["mean", "median", "count"])
+
 c1, c2, c3 = st.columns(3)
 
-c1.metric("Average Salary", f"{currency_symbol}{df_filtered['Display_Salary'].mean():,.0f}")
-c2.metric("Median Salary", f"{currency_symbol}{df_filtered['Display_Salary'].median():,.0f}")
-c3.metric("Records", len(df_filtered))
+c1.metric("Average Salary", f"{currency_symbol}{salary_stats['mean'] * currency_rate:,.0f}")
+c2.metric("Median Salary", f"{currency_symbol}{salary_stats['median'] * currency_rate:,.0f}")
+c3.metric("Records", int(salary_stats["count"]))
 
 # ===============================
 # SALARY DISTRIBUTION
 # ===============================
 st.subheader("Salary Distribution")
 
-fig = px.histogram(
-    df_filtered,
-    x="Display_Salary",
-    nbins=40,
-    title="Salary Distribution",
-    labels={"Display_Salary": f"Annual Salary ({currency})"}
+# Binned on the server; only the 40 bar heights are sent to the browser
+salary_counts, salary_edges = salary_histogram(
+    years, experience_levels, employment_types, company_sizes, bins=40
 )
-fig.update_traces(
-    hovertemplate=f"Annual Salary: {currency_symbol}%{{x:,.0f}}<extra></extra>"
-)
-st.plotly_chart(fig, use_container_width=True)
+
+fig = salary_distribution_figure(salary_counts, salary_edges, currency_rate, currency, currency_symbol)
+st.plotly_chart(fig, use_container_width=True, key="hist")
 
 # ===============================
 # Data Download
 # ===============================
 st.sidebar.download_button(
     "📥 Download Filtered Data",
-    data=df_filtered.to_csv(index=False),
+    data=filtered_csv(years, experience_levels, employment_types, company_sizes),
     file_name="filtered_data.csv",
     mime="text/csv"
 )
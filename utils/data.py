@@ -0,0 +1,182 @@
+# ===============================
+# utils/data.py
+# ===============================
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "Data"
+
+# Columns used by the dashboard; everything else is dropped at load
+KEEP_COLS = [
+    "Year", "Experience_Level", "Employment_Type", "Company_Size",
+    "Salary_In_Usd", "Job_Title", "Remote_Ratio", "Employee_Residence_Iso3"
+]
+
+# Low-cardinality text columns stored as pandas categoricals
+CAT_COLS = [
+    "Experience_Level", "Employment_Type", "Company_Size", "Job_Title",
+    "Employee_Residence_Iso3", "Remote_Ratio"
+]
+
+FILTER_COLS = ["Year", "Experience_Level", "Employment_Type", "Company_Size"]
+
+DTYPES = {
+    **{col: "category" for col in CAT_COLS},
+    "Salary_In_Usd": "float32",
+    "Year": "int16",
+}
+
+# ===============================
+# Data Loading
+# ===============================
+
+# Shared by every page so Streamlit keeps a single cached copy of the dataset
+@st.cache_data(ttl="1h", max_entries=2)
+def load_data():
+    # Parquet (pre-converted from Salaries.csv, see convert_csv_to_parquet)
+    path = DATA_DIR / "Salaries.parquet"
+    _validate_columns(pq.read_schema(path).names)
+    return pd.read_parquet(path, engine="pyarrow", columns=KEEP_COLS).astype(DTYPES)
+
+    # URL (CSV on GitHub, uncomment to read the raw source instead)
+    #url = "https://raw.githubusercontent.com/DegsTerin/Dashboard/refs/heads/main/Data/Salaries.csv"
+    #_validate_columns(pd.read_csv(url, nrows=0).columns)
+    #return pd.read_csv(url, usecols=KEEP_COLS).astype(DTYPES)
+
+
+# Checked against the source header before reading, since selecting a missing
+# column would otherwise fail with a raw pyarrow/pandas error
+def _validate_columns(columns):
+    if not set(KEEP_COLS).issubset(columns):
+        st.error("The dataset does not contain all the necessary columns.")
+        st.stop()
+
+
+# Sorted choices for the sidebar filters, computed once per dataset load
+@st.cache_data(ttl="1h", max_entries=2)
+def load_filter_options():
+    df = load_data()
+    return {col: sorted(df[col].dropna().unique().tolist()) for col in FILTER_COLS}
+
+
+# Sorted job titles for the comparison selectboxes; Job_Title is categorical,
+# so these are its categories rather than a scan of the column
+@st.cache_data(ttl="1h", max_entries=2)
+def load_job_titles():
+    return sorted(load_data()["Job_Title"].cat.categories.tolist())
+
+
+# ===============================
+# Filter with cache
+# ===============================
+
+# Keyed on the selected filter values only, so Streamlit does not re-hash the
+# full dataset on every rerun and pages with the same filters share one entry
+@st.cache_data(ttl="1h", max_entries=20)
+def filter_data(years, experience_levels, employment_types, company_sizes):
+    df = load_data()
+    return df[_filter_mask(df, years, experience_levels, employment_types, company_sizes)]
+
+
+# Filtered rows without salaries above the 99th percentile (charts only).
+# Cached per filter selection so the quantile is not recomputed on reruns
+# that leave the filters unchanged, such as switching currency.
+@st.cache_data(ttl="1h", max_entries=20)
+def filter_vis_data(years, experience_levels, employment_types, company_sizes):
+    df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
+    if df_filtered.empty:
+        return df_filtered
+
+    limit = df_filtered["Salary_In_Usd"].quantile(0.99)
+    return df_filtered[df_filtered["Salary_In_Usd"] <= limit]
+
+
+def _filter_mask(df, years, experience_levels, employment_types, company_sizes):
+    # Single boolean buffer combined in place instead of one temporary per condition
+    mask = df["Year"].isin(years).to_numpy()
+    mask &= df["Experience_Level"].isin(experience_levels).to_numpy()
+    mask &= df["Employment_Type"].isin(employment_types).to_numpy()
+    mask &= df["Company_Size"].isin(company_sizes).to_numpy()
+    return mask
+
+
+# ===============================
+# Salary Histogram
+# ===============================
+
+# Bins salaries on the server so only the bin counts are sent to Plotly,
+# not every row. Returns (counts, edges) in USD.
+@st.cache_data(ttl="1h", max_entries=20)
+def salary_histogram(years, experience_levels, employment_types, company_sizes, bins, trim_outliers=False):
+    if trim_outliers:
+        df_filtered = filter_vis_data(years, experience_levels, employment_types, company_sizes)
+    else:
+        df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
+    return np.histogram(df_filtered["Salary_In_Usd"].to_numpy(), bins=bins)
+
+
+# ===============================
+# Data Export
+# ===============================
+
+# CSV bytes for the download button, encoded once per filter selection
+# rather than on every rerun
+@st.cache_data(ttl="1h", max_entries=20)
+def filtered_csv(years, experience_levels, employment_types, company_sizes):
+    df_filtered = filter_data(years, experience_levels, employment_types, company_sizes)
+    return df_filtered.to_csv(index=False).encode("utf-8")
+
+
+# ===============================
+# Aggregate Cube
+# ===============================
+
+# Filter columns plus the chart dimensions; averages for any combination of
+# them can be rebuilt from the per-group salary sums and counts. Rows with a
+# missing dimension (e.g. no ISO3 code for residence "XK") are kept
+CUBE_DIMS = [
+    "Year", "Experience_Level", "Employment_Type", "Company_Size",
+    "Job_Title", "Employee_Residence_Iso3"
+]
+
+@st.cache_data(ttl="1h", max_entries=2)
+def load_cube():
+    df = load_data()
+    return (
+        df.assign(Salary_In_Usd=df["Salary_In_Usd"].astype("float64"))
+        .groupby(CUBE_DIMS, observed=True, dropna=False)
+        .agg(salary_sum=("Salary_In_Usd", "sum"), salary_count=("Salary_In_Usd", "count"))
+        .reset_index()
+    )
+
+
+@st.cache_data(ttl="1h", max_entries=20)
+def filter_cube(years, experience_levels, employment_types, company_sizes):
+    cube = load_cube()
+    return cube[_filter_mask(cube, years, experience_levels, employment_types, company_sizes)]
+
+
+def cube_mean(cube, by):
+    # Average USD salary per group, computed from the cube instead of raw rows
+    totals = cube.groupby(by, observed=True)[["salary_sum", "salary_count"]].sum()
+    return (totals["salary_sum"] / totals["salary_count"]).rename("Salary_In_Usd")
+
+
+# ===============================
+# Parquet Conversion
+# ===============================
+
+def convert_csv_to_parquet():
+    # Run after updating Salaries.csv: python -m utils.data
+    # astype after parsing, since read_csv(dtype="category") does not keep the
+    # categories sorted, which would change the order of groupby results
+    df = pd.read_csv(DATA_DIR / "Salaries.csv", usecols=KEEP_COLS).astype(DTYPES)
+    df.to_parquet(DATA_DIR / "Salaries.parquet", engine="pyarrow", index=False)
+
+
+if __name__ == "__main__":
+    convert_csv_to_parquet()